@@ -14,3 +14,6 @@ else:
     assert system() == "Linux", f"Platform not supported: {system()}"
     PLAYER_LOG_PATH = Path.home().joinpath(".config/unity3d/MIT/TDW/Player.log")
     EDITOR_LOG_PATH = Path.home().joinpath(".config/unity3d/Editor.log")
+
+# The cached ID of the audio device used to capture system audio.
+AUDIO_DEVICE_CACHE_PATH = Path.home().joinpath(".cache/tdw/audio_device")
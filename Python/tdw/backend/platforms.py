@@ -1,18 +1,15 @@
-from typing import Dict
+from types import MappingProxyType
+from typing import Mapping
 
 # Convert platform.system() to S3 URL infixes.
-SYSTEM_TO_S3: Dict[str, str] = {"Windows": "windows",
-                                "Darwin": "osx",
-                                "Linux": "linux"}
+SYSTEM_TO_S3: Mapping[str, str] = MappingProxyType({"Windows": "windows",
+                                                    "Darwin": "osx",
+                                                    "Linux": "linux"})
 # Convert S3 URL infixes to Unity build targets.
-S3_TO_UNITY: Dict[str, str] = {"windows": "StandaloneWindows64",
-                               "osx": "StandaloneOSX",
-                               "linux": "StandaloneLinux64"}
+S3_TO_UNITY: Mapping[str, str] = MappingProxyType({"windows": "StandaloneWindows64",
+                                                   "osx": "StandaloneOSX",
+                                                   "linux": "StandaloneLinux64"})
 # Convert platform.system() to Unity build targets.
-SYSTEM_TO_UNITY: Dict[str, str] = {"Windows": "StandaloneWindows64",
-                                   "Darwin": "StandaloneOSX",
-                                   "Linux": "StandaloneLinux64"}
+SYSTEM_TO_UNITY: Mapping[str, str] = MappingProxyType({k: S3_TO_UNITY[v] for k, v in SYSTEM_TO_S3.items()})
 # Convert Unity build targets to platform.system()
-UNITY_TO_SYSTEM: Dict[str, str] = {"StandaloneWindows64": "Windows",
-                                   "StandaloneOSX": "Darwin",
-                                   "StandaloneLinux64": "Linux"}
+UNITY_TO_SYSTEM: Mapping[str, str] = MappingProxyType({v: k for k, v in SYSTEM_TO_UNITY.items()})
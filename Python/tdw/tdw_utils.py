@@ -2,25 +2,40 @@ import numpy as np
 import random
 import math
 import zmq
-import time
-from scipy.spatial import distance
-from tdw.output_data import IsOnNavMesh, Images
+from tdw.output_data import OutputData, IsOnNavMesh, Images
 from PIL import Image
 import io
 import os
-from threading import Thread
+from threading import Thread, Event
+import atexit
 from tdw.controller import Controller
 from typing import List, Tuple, Dict, Optional, Union
 import socket
-from contextlib import closing
+from contextlib import closing, ExitStack
 from tdw.librarian import ModelRecord
 from pathlib import Path
 import boto3
 from botocore.exceptions import ProfileNotFound, ClientError
 from subprocess import check_output, Popen, call
 import re
+import shutil
 from psutil import pid_exists
 import base64
+import json
+import array
+from numbers import Real
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+from tdw.backend.paths import AUDIO_DEVICE_CACHE_PATH
+
+# Convert the RGB channels of a _depth pass pixel to a depth value: (r * 256^2 + g * 256 + b) / 256^3 * far plane.
+_DEPTH_FACTORS = np.array([256 * 256, 256, 1], dtype=np.float64) * (100.1 / (256 * 256 * 256))
+# Find the system audio capture device in the output of `fmedia --list-dev`.
+_DEV_RE = re.compile(r"device #(.*): Stereo Mix", flags=re.MULTILINE)
+# The absolute path to fmedia. If fmedia isn't on the PATH, calls will fail with the usual "not found" error.
+_FMEDIA = shutil.which("fmedia") or "fmedia"
+# The random number generator used for batched sampling.
+_RNG = np.random.default_rng()
 
 
 class TDWUtils:
@@ -35,6 +50,13 @@ class TDWUtils:
     """
 
     VECTOR3_ZERO = {"x": 0, "y": 0, "z": 0}
+    # Keep-alive threads started by launch_build(). Key = The build port.
+    _KEEP_ALIVE_WORKERS: Dict[int, "_KeepAliveWorker"] = dict()
+    # Cached results of get_unit_scale(). Key = The model record. Value = A tuple: The record's bounds, the unit scale.
+    # This isn't stored on the record itself because that would add it to the record's serializable dictionary.
+    _UNIT_SCALES: WeakKeyDictionary = WeakKeyDictionary()
+    # If True, validate_amazon_s3() already succeeded in this process.
+    _S3_VALIDATED: bool = False
 
     @staticmethod
     def vector3_to_array(vector3: Dict[str, float]) -> np.array:
@@ -46,7 +68,22 @@ class TDWUtils:
         :return A numpy array.
         """
 
-        return np.array([vector3["x"], vector3["y"], vector3["z"]])
+        return np.asarray((vector3["x"], vector3["y"], vector3["z"]), dtype=np.float64)
+
+    @staticmethod
+    def vectors3_to_array(vectors3: List[Dict[str, float]]) -> np.array:
+        """
+        Convert a list of Vector3 objects to a single numpy array.
+        This is faster than calling `vector3_to_array()` per Vector3.
+
+        :param vectors3: The Vector3 objects, e.g. `[{"x": 0, "y": 0, "z": 0}, {"x": 1, "y": 0, "z": 0}]`
+
+        :return A numpy array with shape (N, 3).
+        """
+
+        return np.fromiter((v[k] for v in vectors3 for k in "xyz"),
+                           dtype=np.float64,
+                           count=3 * len(vectors3)).reshape(-1, 3)
 
     @staticmethod
     def array_to_vector3(arr: np.array) -> Dict[str, float]:
@@ -70,7 +107,7 @@ class TDWUtils:
         :return A numpy array.
         """
 
-        return np.array([vector4["x"], vector4["y"], vector4["z"], vector4["w"]])
+        return np.asarray((vector4["x"], vector4["y"], vector4["z"], vector4["w"]), dtype=np.float64)
 
     @staticmethod
     def array_to_vector4(arr: np.array) -> Dict[str, float]:
@@ -126,6 +163,29 @@ class TDWUtils:
 
         return np.array([x, 0, z])
 
+    @staticmethod
+    def get_random_points_in_circle(center: np.array, radius: float, n: int, rng: np.random.Generator = None) -> np.array:
+        """
+        Get random points in a circle, defined by a center and radius.
+        This is much faster than calling `get_random_point_in_circle()` per point.
+
+        :param center: The center of the circle.
+        :param radius: The radius of the circle.
+        :param n: The number of points.
+        :param rng: The numpy random number generator, e.g. `np.random.default_rng(0)`. Use a seeded generator to get reproducible points. If None, use a shared unseeded generator.
+
+        :return A numpy array with shape (n, 3). The y value of each point (`arr[:, 1]`) is always 0.
+        """
+
+        if rng is None:
+            rng = _RNG
+        alpha = rng.uniform(0, 2 * np.pi, n)
+        r = radius * np.sqrt(rng.random(n))
+        points = np.zeros((n, 3))
+        points[:, 0] = r * np.cos(alpha) + center[0]
+        points[:, 2] = r * np.sin(alpha) + center[2]
+        return points
+
     @staticmethod
     def get_magnitude(vector3: Dict[str, float]) -> float:
         """
@@ -136,7 +196,7 @@ class TDWUtils:
         :return The vector magnitude.
         """
 
-        return np.linalg.norm(TDWUtils.vector3_to_array(vector3))
+        return math.sqrt(vector3["x"] ** 2 + vector3["y"] ** 2 + vector3["z"] ** 2)
 
     @staticmethod
     def extend_line(p0: np.array, p1: np.array, d: float, clamp_y=True) -> np.array:
@@ -156,11 +216,16 @@ class TDWUtils:
             p1[1] = 0
 
         # Get the distance between the two points.
-        d0 = distance.euclidean(p0, p1)
-        # Get the total distance.
-        d_total = d0 + d
+        diff = p1 - p0
+        if clamp_y:
+            d0 = math.hypot(diff[0], diff[2])
+        else:
+            d0 = math.sqrt(float(diff @ diff))
+        if d0 == 0:
+            return p1.copy()
 
-        return p1 + ((p1 - p0) * d_total)
+        # Move along the normalized direction of the line.
+        return p1 + (diff / d0 * d)
 
     @staticmethod
     def get_distance(vector3_0: Dict[str, float], vector3_1: Dict[str, float]) -> float:
@@ -173,7 +238,43 @@ class TDWUtils:
         :return The distance.
         """
 
-        return distance.euclidean(TDWUtils.vector3_to_array(vector3_0), TDWUtils.vector3_to_array(vector3_1))
+        dx = vector3_0["x"] - vector3_1["x"]
+        dy = vector3_0["y"] - vector3_1["y"]
+        dz = vector3_0["z"] - vector3_1["z"]
+        return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+    @staticmethod
+    def get_distances(a: np.array, b: np.array = None) -> np.array:
+        """
+        Calculate the distance between each point in `a` and each point in `b`.
+        This is much faster than calling `get_distance()` per pair of points.
+
+        :param a: The first array of points, with shape (N, 3).
+        :param b: The second array of points, with shape (M, 3). If None, calculate the distances between each point in `a`.
+
+        :return A numpy array of distances with shape (N, M), or (N, N) if `b` is None. If `b` isn't None, the distances are calculated with matrix multiplication and may have a small floating point error (roughly 1e-8 times the spread of the points); for example, the distance between two identical points might not be exactly 0.
+        """
+
+        a = np.asarray(a, dtype=np.float64)
+        if b is None:
+            # Calculate the exact distances of the upper triangle, one row at a time, and mirror them.
+            d = np.zeros((a.shape[0], a.shape[0]))
+            for i in range(a.shape[0]):
+                d[i, i:] = np.sqrt(np.sum((a[i:] - a[i]) ** 2, axis=1))
+            return np.maximum(d, d.T)
+        b = np.asarray(b, dtype=np.float64)
+        # Center the points around a shared offset. This doesn't change the distances, but it reduces floating point error.
+        offset = a.mean(axis=0) if a.shape[0] > 0 else 0
+        a = a - offset
+        b = b - offset
+
+        # |a - b|^2 = |a|^2 + |b|^2 - 2(a . b)
+        # The dot products are calculated as a single matrix multiplication.
+        sq = np.einsum("ij,ij->i", a, a)[:, np.newaxis] + np.einsum("ij,ij->i", b, b)[np.newaxis, :]
+        sq -= 2 * (a @ b.T)
+        # Remove small negative values caused by floating point error.
+        np.maximum(sq, 0, out=sq)
+        return np.sqrt(sq, out=sq)
 
     @staticmethod
     def get_box(width: int, length: int) -> List[Dict[str, int]]:
@@ -185,12 +286,29 @@ class TDWUtils:
         :return The box as represented by a list of `{"x": x, "y": y}` dictionaries.
         """
 
-        box = []
-        for x in range(width):
-            for y in range(length):
-                if x == 0 or x == width - 1 or y == 0 or y == length - 1:
-                    box.append({"x": x, "y": y})
-        return box
+        return [{"x": x, "y": y} for x, y in TDWUtils._get_box_points(width, length)]
+
+    @staticmethod
+    @lru_cache()
+    def _get_box_points(width: int, length: int) -> Tuple[Tuple[int, int], ...]:
+        """
+        :param width: The width of the box.
+        :param length: The length of the box.
+
+        :return The (x, y) points along the edges of the box, sorted by x and then y. This is cached because rooms tend to be the same size.
+        """
+
+        if width <= 0 or length <= 0:
+            return tuple()
+        # The first column.
+        points = [(0, y) for y in range(length)]
+        # The top and bottom of each interior column.
+        edges = (0, length - 1) if length > 1 else (0,)
+        points.extend([(x, y) for x in range(1, width - 1) for y in edges])
+        # The last column.
+        if width > 1:
+            points.extend([(width - 1, y) for y in range(length)])
+        return tuple(points)
 
     @staticmethod
     def get_vector3(x, y, z) -> Dict[str, float]:
@@ -218,33 +336,31 @@ class TDWUtils:
     @staticmethod
     def create_room_from_image(filepath: str, exterior_color=(255, 0, 0), interior_color=(0, 0, 0)) -> List[dict]:
         """
-        Load a .png file from the disk and use it to create a room. Each pixel on the image is a grid point.
+        Load a .png file from the disk and use it to create a room. Each pixel on the image is a grid point. The image must be square.
 
         :param filepath: The absolute filepath to the image.
-        :param exterior_color: The color on the image marking exterior walls (default=red).
-        :param interior_color: The color on the image marking interior walls (default=black).
+        :param exterior_color: The color on the image marking exterior walls (default=red). Must be an (r, g, b) tuple of whole numbers between 0 and 255.
+        :param interior_color: The color on the image marking interior walls (default=black). Must be an (r, g, b) tuple of whole numbers between 0 and 255.
 
         :return: A list of commands: The first creates the exterior walls, and the second creates the interior walls.
         """
 
-        exterior_walls = []
-        interior_walls = []
+        for color in [exterior_color, interior_color]:
+            if len(color) != 3 or not all(isinstance(c, Real) and float(c).is_integer() and 0 <= c <= 255 for c in color):
+                raise ValueError(f"Invalid color {color}; expected an (r, g, b) tuple of whole numbers between 0 and 255.")
 
-        # Read the image.
+        # Read the image. Transpose the array so that each pixel is indexed as [i, j] (the same as PIL).
         img = Image.open(filepath)
-        pixels = img.load()
         col, row = img.size
+        if col != row:
+            raise ValueError(f"The image must be square but its size is {col}x{row}: {filepath}")
+        pixels = np.asarray(img.convert("RGB")).transpose(1, 0, 2)
 
         # Read each pixel as a grid point.
-        for i in range(row):
-            for j in range(col):
-                pixel = pixels[i, j]
-                if len(pixel) == 4:
-                    pixel = (pixel[0], pixel[1], pixel[2])
-                if pixel == exterior_color:
-                    exterior_walls.append({"x": i, "y": col - j})
-                elif pixel == interior_color:
-                    interior_walls.append({"x": i, "y": col - j})
+        exterior = np.all(pixels == np.array(exterior_color, dtype=np.uint8), axis=-1)
+        interior = np.all(pixels == np.array(interior_color, dtype=np.uint8), axis=-1) & ~exterior
+        exterior_walls = [{"x": int(i), "y": int(col - j)} for i, j in zip(*np.nonzero(exterior))]
+        interior_walls = [{"x": int(i), "y": int(col - j)} for i, j in zip(*np.nonzero(interior))]
 
         return [{"$type": "create_exterior_walls",
                  "walls": exterior_walls},
@@ -265,8 +381,7 @@ class TDWUtils:
         :param append_pass: If false, the image pass will _not_ be appended to the filename as a prefix, e.g.: `"0000"`: -> "`0000.jpg"`
         """
 
-        if not os.path.isdir(output_directory):
-            os.makedirs(output_directory)
+        os.makedirs(output_directory, exist_ok=True)
 
         for i in range(images.get_num_passes()):
             if append_pass:
@@ -278,8 +393,24 @@ class TDWUtils:
                 TDWUtils.get_pil_image(images, i).resize((resize_to[0], resize_to[1]), Image.LANCZOS)\
                     .save(os.path.join(output_directory, fi))
             else:
-                with open(os.path.join(output_directory, fi), "wb") as f:
-                    f.write(images.get_image(i))
+                TDWUtils._write_bytes(os.path.join(output_directory, fi), images.get_image(i))
+
+    @staticmethod
+    def _write_bytes(path: str, data: bytes) -> None:
+        """
+        Write raw bytes to a file without the overhead of a Python file object.
+
+        :param path: The path to the file.
+        :param data: The bytes.
+        """
+
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            view = memoryview(data).cast("B")
+            while len(view) > 0:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
 
     @staticmethod
     def zero_padding(integer: int, width=4) -> str:
@@ -308,7 +439,7 @@ class TDWUtils:
         return Image.open(io.BytesIO(images.get_image(index)))
 
     @staticmethod
-    def get_random_position_on_nav_mesh(c: Controller, width: float, length: float, x_e=0, z_e=0, bake=True, rng=random.uniform) -> Tuple[float, float, float]:
+    def get_random_position_on_nav_mesh(c: Controller, width: float, length: float, x_e=0, z_e=0, bake=True, rng=random.uniform, num_candidates: int = 8) -> Tuple[float, float, float]:
         """
         Returns a random position on a NavMesh.
 
@@ -319,6 +450,7 @@ class TDWUtils:
         :param rng: Random number generator.
         :param x_e: The x position of the environment.
         :param z_e: The z position of the environment.
+        :param num_candidates: The number of random positions tested per frame (minimum 1). If none of them are on the NavMesh, the next frame will test twice as many, up to 256 (or `num_candidates` if it is greater than 256).
 
         :return The coordinates as a tuple `(x, y, z)`
         """
@@ -327,21 +459,24 @@ class TDWUtils:
             c.communicate({'$type': 'bake_nav_mesh'})
 
         # Try to find a valid position on the NavMesh.
-        is_on = False
-        x, y, z = (0, 0, 0)
-        while not is_on:
-            # Get a random position.
-            x = rng(-width / 2, width / 2) + x_e
-            z = rng(-length / 2, length / 2) + z_e
-            resp = c.communicate(
-                {'$type': 'send_is_on_nav_mesh',
-                 'position': {'x': x, 'y': 0, 'z': z},
-                 'max_distance': 4.0
-                 })
-            answer = IsOnNavMesh(resp[0])
-            is_on = answer.get_is_on()
-            x, y, z = answer.get_position()
-        return x, y, z
+        # Test many random positions per frame rather than one position per frame.
+        num_candidates = max(1, num_candidates)
+        while True:
+            commands = []
+            for _ in range(num_candidates):
+                # Get a random position.
+                x = rng(-width / 2, width / 2) + x_e
+                z = rng(-length / 2, length / 2) + z_e
+                commands.append({'$type': 'send_is_on_nav_mesh',
+                                 'position': {'x': x, 'y': 0, 'z': z},
+                                 'max_distance': 4.0})
+            resp = c.communicate(commands)
+            for r in resp[:-1]:
+                if OutputData.get_data_type_id(r) == "isnm":
+                    answer = IsOnNavMesh(r)
+                    if answer.get_is_on():
+                        return answer.get_position()
+            num_candidates = max(num_candidates, min(num_candidates * 2, 256))
 
     @staticmethod
     def set_visual_material(c: Controller, substructure: List[dict], object_id: int, material: str, quality="med") -> List[dict]:
@@ -373,17 +508,17 @@ class TDWUtils:
         The far plane is hardcoded as 100. The near plane is hardcoded as 0.1.
         (This is due to how the depth shader is implemented.)
 
-        :param image: The image pass as a numpy array.
+        :param image: The image pass as a numpy array. This can also be an image that has already been decoded to a numpy array of shape (height, width, 3 or 4), in which case it won't be decoded again.
 
         :return An array of depth values.
         """
 
-        # Convert the image to a 2D image array.
-        image = np.array(Image.open(io.BytesIO(image)))
+        # Convert the image to a 2D image array. Use the decoded pixel buffer as-is rather than copying it.
+        if np.ndim(image) != 3:
+            image = np.asarray(Image.open(io.BytesIO(image)))
 
-        depth = np.array((image[:, :, 0] * 256 * 256 + image[:, :, 1] * 256 + image[:, :, 2]) /
-                         (256 * 256 * 256) * 100.1)
-        return depth
+        # Scale each channel by its precomputed factor. This avoids the large intermediate integer arrays.
+        return image[:, :, 0] * _DEPTH_FACTORS[0] + image[:, :, 1] * _DEPTH_FACTORS[1] + image[:, :, 2] * _DEPTH_FACTORS[2]
 
     @staticmethod
     def create_avatar(avatar_type="A_Img_Caps_Kinematic", avatar_id="a", position=None, look_at=None) -> List[dict]:
@@ -432,22 +567,23 @@ class TDWUtils:
         return build_info
 
     @staticmethod
-    def _send_keep_alive(socket, build_info: dict) -> dict:
+    def _send_keep_alive(socket, build_info: dict) -> None:
         """
         This sends a command to the launch_binaries daemon running on a remote node
         to mark a given binary as still alive, preventing garbage collection.
+        This doesn't wait for the daemon to reply.
 
-        :param socket: The zmq socket.
+        :param socket: The zmq DEALER socket.
         :param build_info: A diciontary containing the build_port.
-
-        :return a heartbeat indicating build is still alive.
         """
 
+        # Discard the replies to previous heartbeats.
+        while socket.poll(0, zmq.POLLIN):
+            socket.recv_multipart()
         build_port = build_info["build_port"]
         request = {"type": "keep_alive", "build_port": build_port}
-        socket.send_json(request)
-        heartbeat = socket.recv_json()
-        return heartbeat
+        # Add the empty delimiter frame that a REQ socket would add so that the daemon's REP socket accepts the message.
+        socket.send_multipart([b"", json.dumps(request).encode("utf-8")])
 
     @staticmethod
     def _send_kill_build(socket, build_info: dict) -> dict:
@@ -466,18 +602,6 @@ class TDWUtils:
         kill_status = socket.recv_json()
         return kill_status
 
-    @staticmethod
-    def _keep_alive_thread(socket, build_info: dict) -> None:
-        """
-        This is a wrapper around the keep alive command to be executed in a separate thread.
-
-        :param socket: The zmq socket.
-        :param build_info: A diciontary containing the build_port.
-        """
-        while True:
-            TDWUtils._send_keep_alive(socket, build_info)
-            time.sleep(60)
-
     @staticmethod
     def launch_build(listener_port: int, build_address: str, controller_address: str) -> dict:
         """
@@ -499,12 +623,38 @@ class TDWUtils:
         socket = context.socket(zmq.REQ)
         socket.connect("tcp://" + build_address + ":%s" % listener_port)
         build_info = TDWUtils._send_start_build(socket, controller_address)
-        thread = Thread(target=TDWUtils._keep_alive_thread,
-                        args=(socket, build_info))
-        thread.setDaemon(True)
-        thread.start()
+        # Send heartbeats on a separate socket so that they never block (or get blocked by) the REQ socket.
+        keep_alive_socket = context.socket(zmq.DEALER)
+        keep_alive_socket.connect("tcp://" + build_address + ":%s" % listener_port)
+        worker = _KeepAliveWorker(keep_alive_socket, build_info)
+        # Stop any previous thread for this port so that it isn't orphaned.
+        TDWUtils.stop_keep_alive(build_info)
+        worker.start()
+        TDWUtils._KEEP_ALIVE_WORKERS[build_info["build_port"]] = worker
         return build_info
 
+    @staticmethod
+    def stop_keep_alive(build_info: dict) -> None:
+        """
+        Stop sending keep-alive heartbeats for a build launched with `launch_build()`. This is done automatically when the controller exits.
+
+        :param build_info: The build_info dictionary returned by `launch_build()`.
+        """
+
+        worker = TDWUtils._KEEP_ALIVE_WORKERS.pop(build_info["build_port"], None)
+        if worker is not None:
+            worker.stop()
+
+    @staticmethod
+    def _stop_all_keep_alive() -> None:
+        """
+        Stop every keep-alive thread started by `launch_build()`. This is registered to run when the controller exits.
+        """
+
+        for worker in TDWUtils._KEEP_ALIVE_WORKERS.values():
+            worker.stop()
+        TDWUtils._KEEP_ALIVE_WORKERS.clear()
+
     @staticmethod
     def get_unity_args(arg_dict: dict) -> List[str]:
         """
@@ -534,25 +684,52 @@ class TDWUtils:
             return int(s.getsockname()[1])
 
     @staticmethod
-    def euler_to_quaternion(euler: Tuple[float, float, float]) -> List[float]:
+    def find_free_ports(n: int) -> List[int]:
+        """
+        Use this instead of calling `find_free_port()` n times; every socket stays bound until all of the ports have been found, so the ports are guaranteed to be different.
+
+        :param n: The number of ports.
+
+        :return A list of n different free ports.
+        """
+
+        with ExitStack() as stack:
+            sockets = [stack.enter_context(closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM))) for _ in range(n)]
+            for s in sockets:
+                s.bind(("", 0))
+            return [int(s.getsockname()[1]) for s in sockets]
+
+    @staticmethod
+    def euler_to_quaternion(euler: Union[Tuple[float, float, float], np.array]) -> Union[List[float], np.array]:
         """
         Convert Euler angles to a quaternion.
 
-        :param euler: The Euler angles vector.
+        :param euler: The Euler angles vector. This can also be a numpy array of Euler angles with shape (N, 3).
+
+        :return The quaternion `[x, y, z, w]`, or a numpy array of quaternions with shape (N, 4) if `euler` is 2D.
         """
 
-        roll, pitch, yaw = euler
-        cy = np.cos(yaw * 0.5)
-        sy = np.sin(yaw * 0.5)
-        cp = np.cos(pitch * 0.5)
-        sp = np.sin(pitch * 0.5)
-        cr = np.cos(roll * 0.5)
-        sr = np.sin(roll * 0.5)
+        batch = np.ndim(euler) > 1
+        if not batch:
+            # Use scalar math for a single rotation; numpy's overhead is greater than the calculation itself.
+            roll, pitch, yaw = euler
+            cy = math.cos(yaw * 0.5)
+            sy = math.sin(yaw * 0.5)
+            cp = math.cos(pitch * 0.5)
+            sp = math.sin(pitch * 0.5)
+            cr = math.cos(roll * 0.5)
+            sr = math.sin(roll * 0.5)
+        else:
+            half = np.asarray(euler, dtype=np.float64) * 0.5
+            cr, cp, cy = np.cos(half).T
+            sr, sp, sy = np.sin(half).T
 
         w = cy * cp * cr + sy * sp * sr
         x = cy * cp * sr - sy * sp * cr
         y = sy * cp * sr + cy * sp * cr
         z = sy * cp * cr - cy * sp * sr
+        if batch:
+            return np.stack([x, y, z, w], axis=1)
         return [x, y, z, w]
 
     @staticmethod
@@ -565,11 +742,17 @@ class TDWUtils:
 
         bounds = record.bounds
 
+        # Use the cached scale if the record's bounds haven't been replaced since it was calculated.
+        cached = TDWUtils._UNIT_SCALES.get(record)
+        if cached is not None and cached[0] is bounds:
+            return cached[1]
+
         # Get the "unit scale" of the object.
         s = 1 / max(
             bounds['top']['y'] - bounds['bottom']['y'],
             bounds['front']['z'] - bounds['back']['z'],
             bounds['right']['x'] - bounds['left']['x'])
+        TDWUtils._UNIT_SCALES[record] = (bounds, s)
         return s
 
     @staticmethod
@@ -580,6 +763,9 @@ class TDWUtils:
         :return True if everything is OK.
         """
 
+        if TDWUtils._S3_VALIDATED:
+            return True
+
         config_path = Path.home().joinpath(".aws/config")
         new_config_path = not config_path.exists()
         # Generate a valid config file.
@@ -588,24 +774,36 @@ class TDWUtils:
             print(f"Generated a new config file: {config_path.resolve()}")
 
         try:
-            session = boto3.Session(profile_name="tdw")
-            s3 = session.resource("s3")
-            tdw_private = False
-            for bucket in s3.buckets.all():
-                if bucket.name == "tdw-private":
-                    tdw_private = True
-            if not tdw_private:
-                print("ERROR! Could not access bucket tdw-private. Make sure you have the right permissions.")
-                return False
+            # A single HEAD request is much faster than listing every bucket.
+            TDWUtils._get_s3_client().head_bucket(Bucket="tdw-private")
+            TDWUtils._S3_VALIDATED = True
             return True
         except ProfileNotFound:
             print(f"ERROR! Your AWS credentials file is not set up correctly.")
             print("Your AWS credentials must have a [tdw] profile with valid keys.")
             return False
-        except ClientError:
-            print("Error! Bad S3 credentials.")
+        except ClientError as e:
+            # Recreate the client (and reload the credentials) next time.
+            TDWUtils._get_s3_client.cache_clear()
+            code = e.response["Error"]["Code"]
+            if code == "404":
+                print("ERROR! Bucket tdw-private doesn't exist.")
+            # HEAD responses don't have a body, so bad keys and missing permissions are both just "403".
+            elif code == "403":
+                print("ERROR! Could not access bucket tdw-private. Either your S3 credentials are bad or you don't have the right permissions.")
+            else:
+                print("Error! Bad S3 credentials.")
             return False
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _get_s3_client():
+        """
+        :return: An S3 client for the tdw profile. This is cached because creating a session is slow.
+        """
+
+        return boto3.Session(profile_name="tdw").client("s3")
+
     @staticmethod
     def get_base64_flex_particle_forces(forces: list) -> str:
         """
@@ -614,8 +812,50 @@ class TDWUtils:
         :return: An array of Flex particle forces encoded in base64.
         """
 
-        forces = np.array(forces, dtype=np.float32)
-        return base64.b64encode(forces).decode()
+        # Avoid numpy's per-call overhead when converting a flat list. Either way, encode the buffer without copying it.
+        if not isinstance(forces, np.ndarray) and (len(forces) == 0 or isinstance(forces[0], Real)):
+            buffer = array.array("f", forces)
+        # Numpy flattens arrays and nested lists, e.g. `[[f1_x, f1_y, f1_z, f1_id], ...]`
+        else:
+            buffer = np.ascontiguousarray(forces, dtype=np.float32)
+        return base64.b64encode(memoryview(buffer)).decode()
+
+
+# Stop the keep-alive threads when the controller exits.
+atexit.register(TDWUtils._stop_all_keep_alive)
+
+
+class _KeepAliveWorker(Thread):
+    """
+    A thread that periodically tells the launch_binaries daemon that a build is still alive.
+    """
+
+    def __init__(self, socket, build_info: dict, interval: float = 60):
+        """
+        :param socket: The zmq DEALER socket. Only this thread may use it.
+        :param build_info: A dictionary containing the build_port.
+        :param interval: The time in seconds between heartbeats.
+        """
+
+        super().__init__(daemon=True)
+        self.socket = socket
+        self.build_info: dict = build_info
+        self.interval: float = interval
+        self._stop_event: Event = Event()
+
+    def run(self) -> None:
+        TDWUtils._send_keep_alive(self.socket, self.build_info)
+        # Wait between heartbeats. stop() wakes the thread up immediately.
+        while not self._stop_event.wait(self.interval):
+            TDWUtils._send_keep_alive(self.socket, self.build_info)
+        self.socket.close(linger=0)
+
+    def stop(self) -> None:
+        """
+        Stop sending heartbeats.
+        """
+
+        self._stop_event.set()
 
 
 class AudioUtils:
@@ -650,13 +890,27 @@ class AudioUtils:
     @staticmethod
     def get_system_audio_device() -> str:
         """
+        The device is cached in `~/.cache/tdw/audio_device` so that fmedia only needs to list the devices once per machine. Delete this file if the device changes.
+
         :return: The audio device that can be used to capture system audio.
         """
 
-        devices = check_output(["fmedia", "--list-dev"]).decode("utf-8").split("Capture:")[1]
-        dev_search = re.search("device #(.*): Stereo Mix", devices, flags=re.MULTILINE)
+        if AUDIO_DEVICE_CACHE_PATH.exists():
+            device = AUDIO_DEVICE_CACHE_PATH.read_text(encoding="utf-8").strip()
+            if device != "":
+                return device
+
+        devices = check_output([_FMEDIA, "--list-dev"]).decode("utf-8").split("Capture:")[1]
+        dev_search = _DEV_RE.search(devices)
         assert dev_search is not None, "No suitable audio capture device found:\n" + devices
-        return dev_search.group(1)
+        device = dev_search.group(1)
+
+        # Write to a temporary file first so that other processes never read a partial cache.
+        AUDIO_DEVICE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        temp = AUDIO_DEVICE_CACHE_PATH.parent.joinpath(f"{AUDIO_DEVICE_CACHE_PATH.name}.{os.getpid()}.tmp")
+        temp.write_text(device, encoding="utf-8")
+        temp.replace(AUDIO_DEVICE_CACHE_PATH)
+        return device
 
     @staticmethod
     def start(output_path: Union[str, Path], until: Optional[Tuple[int, int]] = None) -> None:
@@ -679,7 +933,7 @@ class AudioUtils:
         # Set the capture device.
         if AudioUtils.DEVICE is None:
             AudioUtils.DEVICE = AudioUtils.get_system_audio_device()
-        fmedia_call = ["fmedia",
+        fmedia_call = [_FMEDIA,
                        "--record",
                        f"--dev-capture={AudioUtils.DEVICE}",
                        f"--out={str(p.resolve())}",
@@ -699,7 +953,7 @@ class AudioUtils:
 
         if AudioUtils.RECORDER_PID is not None:
             with open(os.devnull, "w+") as f:
-                call(['fmedia', '--globcmd=quit'], stderr=f, stdout=f)
+                call([_FMEDIA, '--globcmd=quit'], stderr=f, stdout=f)
             AudioUtils.RECORDER_PID = None
 
     @staticmethod